@@ -19,6 +19,10 @@ from datetime import datetime
 import logging
 import json
 import re
+
+# Load environment variables from .env file before importing modules that read them
+load_dotenv()
+
 import rag_service
 
 # Import the alternative PDF generator
@@ -38,9 +42,6 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-load_dotenv()
-
 app = Flask(__name__, static_folder='static', static_url_path='')
 
 # Apply security middleware
@@ -1,9 +1,8 @@
 import os
 import json
-import hashlib
-import uuid
 from datetime import datetime
 from dotenv import load_dotenv
+from security import hash_password
 
 # Load environment variables
 load_dotenv()
@@ -19,15 +18,13 @@ os.makedirs(storage_dir, exist_ok=True)
 # Path to users.json
 users_db_path = os.path.join(storage_dir, 'users.json')
 
-# Generate salt and hash password
-salt = uuid.uuid4().hex
-hashed_password = hashlib.sha256((admin_password + salt).encode()).hexdigest()
+# Hash password (Argon2id)
+hashed_password = hash_password(admin_password)
 
 # Create admin user
 users = {
     "admin": {
         "username": "admin",
-        "salt": salt,
         "hashed_password": hashed_password,
         "is_admin": True,
         "created_at": datetime.now().isoformat()
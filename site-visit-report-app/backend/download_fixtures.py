@@ -0,0 +1,57 @@
+import asyncio
+import io
+import sys
+from pathlib import Path
+import httpx
+from PIL import Image as PILImage
+
+# Optional refresh tool: test_page_layout.py uses the fixtures committed in
+# fixtures/, and this script only replaces them with the Pexels originals below
+
+# Directory holding the images used by test_page_layout.py
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Fixture file names and the images they are downloaded from
+FIXTURES = {
+    "building_1.jpg": "https://images.pexels.com/photos/2219024/pexels-photo-2219024.jpeg",  # Construction site
+    "building_2.jpg": "https://images.pexels.com/photos/1838640/pexels-photo-1838640.jpeg",  # Building exterior
+}
+
+# Long edge (px) and JPEG quality for saved fixtures; the PDF generator scales
+# images to page width anyway, so full-resolution originals only add size
+FIXTURE_MAX_EDGE = 1200
+FIXTURE_QUALITY = 85
+
+# Function to fetch all URLs concurrently over one multiplexed HTTP/2 connection
+async def fetch_all(urls):
+    # The transport carries the HTTP/2 setting and retries failed connects
+    transport = httpx.AsyncHTTPTransport(http2=True, retries=2)
+    async with httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(30, connect=5)) as client:
+        return await asyncio.gather(*(client.get(url) for url in urls), return_exceptions=True)
+
+# Function to downscale one downloaded image and save it as a fixture
+def save_fixture(name, data):
+    with PILImage.open(io.BytesIO(data)) as img:
+        img = img.convert('RGB')
+        img.thumbnail((FIXTURE_MAX_EDGE, FIXTURE_MAX_EDGE), PILImage.LANCZOS)
+        img.save(FIXTURES_DIR / name, 'JPEG', quality=FIXTURE_QUALITY, optimize=True, progressive=True)
+    return (FIXTURES_DIR / name).stat().st_size
+
+if __name__ == "__main__":
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    
+    print("Downloading fixture images...")
+    responses = asyncio.run(fetch_all(FIXTURES.values()))
+    
+    failed = False
+    for name, response in zip(FIXTURES, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            response.raise_for_status()
+            print(f"Saved {name} ({save_fixture(name, response.content) / 1024:.2f} KB)")
+        except Exception as e:
+            print(f"Error downloading {name}: {str(e)}")
+            failed = True
+    
+    sys.exit(1 if failed else 0)
@@ -10,25 +10,37 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Write the finished PDF to file sinks in bounded chunks
+PDF_WRITE_CHUNK_SIZE = 1024 * 1024
+
+# RGB JPEGs are embedded unchanged unless their long edge exceeds this many pixels
+# (about 300 DPI across the 170 mm image box); FPDF scales them to the box itself
+PASSTHROUGH_MAX_PX = 2000
+
 # Monkey patch FPDF to handle Unicode characters
 original_putpages = FPDF._putpages
 
+# Unicode characters that can't be encoded in latin-1, built once so each page
+# is rewritten in a single translate pass
+_LATIN1_REPLACEMENTS = str.maketrans({
+    '\u2122': '(TM)',  # Trademark symbol
+    '\u2013': '-',     # En dash
+    '\u2014': '--',    # Em dash
+    '\u2018': "'",     # Left single quote
+    '\u2019': "'",     # Right single quote
+    '\u201c': '"',     # Left double quote
+    '\u201d': '"',     # Right double quote
+    '\u2022': '*',     # Bullet point
+    '\u00A9': '(C)',   # Copyright symbol
+    '\u00AE': '(R)',   # Registered trademark
+    '\u2026': '...',   # Ellipsis
+})
+
 def patched_putpages(self):
     # Fix encoding issues by replacing Unicode characters that can't be encoded in latin-1
     for i in range(1, len(self.pages) + 1):
-        if self.pages.get(i) and hasattr(self.pages[i], 'replace'):
-            # Replace problematic characters
-            self.pages[i] = self.pages[i].replace('\u2122', '(TM)')  # Trademark symbol
-            self.pages[i] = self.pages[i].replace('\u2013', '-')     # En dash
-            self.pages[i] = self.pages[i].replace('\u2014', '--')    # Em dash
-            self.pages[i] = self.pages[i].replace('\u2018', "'")     # Left single quote
-            self.pages[i] = self.pages[i].replace('\u2019', "'")     # Right single quote
-            self.pages[i] = self.pages[i].replace('\u201c', '"')     # Left double quote
-            self.pages[i] = self.pages[i].replace('\u201d', '"')     # Right double quote
-            self.pages[i] = self.pages[i].replace('\u2022', '*')     # Bullet point
-            self.pages[i] = self.pages[i].replace('\u00A9', '(C)')   # Copyright symbol
-            self.pages[i] = self.pages[i].replace('\u00AE', '(R)')   # Registered trademark
-            self.pages[i] = self.pages[i].replace('\u2026', '...')   # Ellipsis
+        if self.pages.get(i) and isinstance(self.pages[i], str):
+            self.pages[i] = self.pages[i].translate(_LATIN1_REPLACEMENTS)
     
     # Call the original method
     original_putpages(self)
@@ -264,8 +276,17 @@ class ReportPDF(FPDF):
             return True
         return False
 
-def generate_pdf_report(report_data):
-    """Generate a PDF report using FPDF"""
+def generate_pdf_report(report_data, out=None):
+    """
+    Generate a PDF report using FPDF
+    
+    Args:
+        report_data: Report fields and images
+        out: Optional binary file object to write the PDF into
+        
+    Returns:
+        out if given, otherwise a BytesIO holding the PDF, positioned at the start
+    """
     try:
         # Extract data
         project_name = report_data.get('projectName', 'Unknown Project')
@@ -312,19 +333,23 @@ def generate_pdf_report(report_data):
             
             for idx, img_info in enumerate(image_data):
                 try:
-                    if not img_info.get('dataUrl') or not isinstance(img_info['dataUrl'], str) or not img_info['dataUrl'].startswith('data:'):
-                        logger.warning(f"Invalid image data for image {idx+1}")
-                        continue
+                    # Raw JPEG bytes can be passed directly instead of a base64 data URL
+                    jpeg_bytes = img_info.get('jpegBytes')
                     
-                    # Extract base64 data
-                    base64_data = img_info['dataUrl'].split(',')[1] if ',' in img_info['dataUrl'] else None
-                    if not base64_data:
-                        logger.warning(f"Could not extract base64 data for image {idx+1}")
-                        continue
+                    if jpeg_bytes is None:
+                        if not img_info.get('dataUrl') or not isinstance(img_info['dataUrl'], str) or not img_info['dataUrl'].startswith('data:'):
+                            logger.warning(f"Invalid image data for image {idx+1}")
+                            continue
+                        
+                        # Extract base64 data
+                        base64_data = img_info['dataUrl'].split(',')[1] if ',' in img_info['dataUrl'] else None
+                        if not base64_data:
+                            logger.warning(f"Could not extract base64 data for image {idx+1}")
+                            continue
                     
                     # Process image
                     try:
-                        img_bytes = base64.b64decode(base64_data)
+                        img_bytes = jpeg_bytes if jpeg_bytes is not None else base64.b64decode(base64_data)
                         
                         # Create temporary file
                         with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp:
@@ -334,32 +359,43 @@ def generate_pdf_report(report_data):
                         
                         # Process with PIL
                         with PILImage.open(temp_img_path) as img:
+                            # An RGB JPEG within PASSTHROUGH_MAX_PX is embedded as-is (DCTDecode)
+                            reencode = img.format != 'JPEG' or img.mode != 'RGB'
+                            
                             # Convert to RGB if needed
                             if img.mode != 'RGB':
                                 img = img.convert('RGB')
                             
-                            # Calculate dimensions
-                            max_width = 170  # Maximum width in mm - slightly smaller for better margins
-                            max_height = 130  # Maximum height in mm
-                            
-                            # Convert image dimensions to mm (assuming 72 DPI)
-                            img_width_mm = (img.width * 25.4) / 72
-                            img_height_mm = (img.height * 25.4) / 72
-                            
-                            # Calculate scaling ratio
-                            width_ratio = max_width / img_width_mm
-                            height_ratio = max_height / img_height_mm
-                            ratio = min(width_ratio, height_ratio)
+                            if reencode:
+                                # Calculate dimensions
+                                max_width = 170  # Maximum width in mm - slightly smaller for better margins
+                                max_height = 130  # Maximum height in mm
+                                
+                                # Convert image dimensions to mm (assuming 72 DPI)
+                                img_width_mm = (img.width * 25.4) / 72
+                                img_height_mm = (img.height * 25.4) / 72
+                                
+                                # Calculate scaling ratio
+                                width_ratio = max_width / img_width_mm
+                                height_ratio = max_height / img_height_mm
+                                ratio = min(width_ratio, height_ratio)
+                            else:
+                                # Only downsample pass-through JPEGs that are far larger than the page needs
+                                ratio = PASSTHROUGH_MAX_PX / max(img.width, img.height)
                             
                             if ratio < 1:
                                 new_width = int(img.width * ratio)
                                 new_height = int(img.height * ratio)
                                 img = img.resize((new_width, new_height), PILImage.LANCZOS)
+                                reencode = True
                             
-                            # Enhance image quality
-                            processed_path = f"{temp_img_path}_processed.jpg"
-                            img.save(processed_path, 'JPEG', quality=90)  # Higher quality
-                            temp_files.append(processed_path)
+                            if reencode:
+                                # Enhance image quality
+                                processed_path = f"{temp_img_path}_processed.jpg"
+                                img.save(processed_path, 'JPEG', quality=90)  # Higher quality
+                                temp_files.append(processed_path)
+                            else:
+                                processed_path = temp_img_path
                         
                         # Calculate caption height (approximate)
                         caption_height = 0
@@ -449,21 +485,18 @@ def generate_pdf_report(report_data):
             
             logger.info(f"Successfully processed {processed_images} out of {len(image_data)} images")
         
-        # Generate PDF
-        pdf_buffer = io.BytesIO()
-        pdf.output(dest='F', name='temp.pdf')
-        
-        # Read the temp PDF file into the buffer
-        with open('temp.pdf', 'rb') as temp_pdf:
-            pdf_buffer.write(temp_pdf.read())
-        
-        # Clean up the temp PDF file
-        try:
-            os.remove('temp.pdf')
-        except Exception as cleanup_error:
-            logger.error(f"Error cleaning up temp PDF file: {str(cleanup_error)}")
-            
-        pdf_buffer.seek(0)
+        # Generate PDF in memory; FPDF returns the document as a latin-1 string
+        pdf_bytes = pdf.output(dest='S').encode('latin-1')
+        
+        if out is not None:
+            # Write straight to the caller's sink in 1 MiB slices (memoryview avoids copies)
+            view = memoryview(pdf_bytes)
+            for start in range(0, len(view), PDF_WRITE_CHUNK_SIZE):
+                out.write(view[start:start + PDF_WRITE_CHUNK_SIZE])
+            pdf_buffer = out
+        else:
+            # Initialising with the bytes sizes the buffer once instead of regrowing it
+            pdf_buffer = io.BytesIO(pdf_bytes)
         
         # Clean up temp files
         for temp_file in temp_files:
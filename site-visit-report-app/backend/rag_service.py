@@ -1,13 +1,23 @@
 import os
 import sys
+import json
 import pickle
+import hashlib
 import tempfile
+import math
+import uuid
 import logging
 from typing import List, Dict, Any, Optional
 
+import faiss
+import numpy as np
+import torch
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_community.embeddings import SentenceTransformerEmbeddings
 
 # Configure logging
@@ -19,18 +29,56 @@ logger = logging.getLogger(__name__)
 PRODUCT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'product_data')
 os.makedirs(PRODUCT_DATA_DIR, exist_ok=True)
 
+# Directory for cached document chunks, keyed by source file
+CHUNK_CACHE_DIR = os.path.join(PRODUCT_DATA_DIR, '.chunk_cache')
+
 # Path to the vector store file
 VECTOR_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vector_store.pkl')
 
+# Corpora at least this large are indexed with IndexIVFFlat instead of a flat scan
+IVF_MIN_VECTORS = 1000
+
+# Number of IVF cells probed per query
+IVF_NPROBE = 8
+
+# FAISS wants at least this many training vectors per IVF cell
+IVF_MIN_POINTS_PER_CELL = 39
+
 # Embedding model
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Fast and good quality model
 
+# Run embeddings on the GPU when one is available
+EMBEDDING_DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+EMBEDDING_BATCH_SIZE = 256 if EMBEDDING_DEVICE == "cuda" else 32
+
+def _configure_index(index):
+    """Set search-time parameters on IVF indexes; flat indexes are left untouched."""
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return
+    ivf.nprobe = IVF_NPROBE
+
 class RAGService:
     """Service for Retrieval-Augmented Generation with product data using local FAISS storage."""
     
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", ".", " ", ""]
+    )
+    
     def __init__(self):
         """Initialize the RAG service."""
-        self.embedding_model = SentenceTransformerEmbeddings(model_name=EMBEDDING_MODEL)
+        self.embedding_model = SentenceTransformerEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            model_kwargs={"device": EMBEDDING_DEVICE},
+            encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE, "normalize_embeddings": True}
+        )
+        if EMBEDDING_DEVICE == "cuda":
+            # FP16 roughly doubles GPU throughput with negligible recall loss on MiniLM
+            self.embedding_model.client.half()
+        logger.info(f"Embedding model {EMBEDDING_MODEL} running on {EMBEDDING_DEVICE}")
         self.vector_store = None
         self.initialize_vector_store()
     
@@ -43,6 +91,7 @@ class RAGService:
                 with open(VECTOR_STORE_PATH, 'rb') as f:
                     self.vector_store = pickle.load(f)
                 logger.info(f"Loaded vector store from {VECTOR_STORE_PATH}")
+                _configure_index(self.vector_store.index)
             else:
                 logger.info("No existing vector store found. Creating a new one.")
                 self.rebuild_vector_store()
@@ -63,30 +112,10 @@ class RAGService:
             bool: True if successful, False otherwise
         """
         try:
-            # Load the document
-            documents = []
-            file_ext = os.path.splitext(file_path)[1].lower()
-            
-            if file_ext == '.pdf':
-                loader = PyPDFLoader(file_path)
-                documents = loader.load()
-                logger.info(f"Loaded PDF: {file_path}")
-            elif file_ext == '.txt':
-                loader = TextLoader(file_path)
-                documents = loader.load()
-                logger.info(f"Loaded text file: {file_path}")
-            else:
-                logger.error(f"Unsupported file format: {file_ext}")
+            chunks = self._load_and_split(file_path)
+            if chunks is None:
                 return False
             
-            # Split the document into chunks
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                separators=["\n\n", "\n", ".", " ", ""]
-            )
-            chunks = text_splitter.split_documents(documents)
-            
             # Add to local FAISS
             if not self.vector_store:
                 self.vector_store = FAISS.from_documents(chunks, self.embedding_model)
@@ -104,6 +133,59 @@ class RAGService:
             logger.error(f"Error adding product data: {str(e)}")
             return False
     
+    def _load_and_split(self, file_path: str) -> Optional[List[Document]]:
+        """
+        Load a PDF or TXT file and split it into chunks, reusing cached chunks
+        when the file's modification time and size are unchanged.
+        
+        Args:
+            file_path: Path to the file to load
+            
+        Returns:
+            List of chunk Documents, or None if the file format is unsupported
+        """
+        stamp = [file_path, os.path.getmtime(file_path), os.path.getsize(file_path)]
+        cache_path = os.path.join(CHUNK_CACHE_DIR, hashlib.sha1(file_path.encode('utf-8')).hexdigest() + '.json')
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('stamp') == stamp:
+                logger.info(f"Loaded cached chunks for {file_path}")
+                return [Document(page_content=c['page_content'], metadata=c['metadata']) for c in cached['chunks']]
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        # Load the document
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext == '.pdf':
+            loader = PyPDFLoader(file_path)
+            documents = loader.load()
+            logger.info(f"Loaded PDF: {file_path}")
+        elif file_ext == '.txt':
+            loader = TextLoader(file_path)
+            documents = loader.load()
+            logger.info(f"Loaded text file: {file_path}")
+        else:
+            logger.error(f"Unsupported file format: {file_ext}")
+            return None
+        
+        # Split the document into chunks
+        chunks = self.text_splitter.split_documents(documents)
+        
+        try:
+            os.makedirs(CHUNK_CACHE_DIR, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'stamp': stamp,
+                    'chunks': [{'page_content': c.page_content, 'metadata': c.metadata} for c in chunks]
+                }, f)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not cache chunks for {file_path}: {str(e)}")
+        
+        return chunks
+    
     def rebuild_vector_store(self) -> bool:
         """
         Rebuild the vector store from all files in the product_data directory.
@@ -112,20 +194,32 @@ class RAGService:
             bool: True if successful, False otherwise
         """
         try:
-            # Create a new local FAISS vector store
-            self.vector_store = FAISS.from_texts([""], self.embedding_model)
-            
-            # Add all files in the product_data directory
+            # Load and split all files in the product_data directory
             success = True
             file_count = 0
+            chunks = []
             
             for filename in os.listdir(PRODUCT_DATA_DIR):
                 file_path = os.path.join(PRODUCT_DATA_DIR, filename)
                 if os.path.isfile(file_path) and (file_path.lower().endswith('.pdf') or file_path.lower().endswith('.txt')):
-                    if self.add_product_data(file_path):
-                        file_count += 1
-                    else:
+                    try:
+                        file_chunks = self._load_and_split(file_path)
+                    except Exception as e:
+                        logger.error(f"Error loading product data {file_path}: {str(e)}")
+                        file_chunks = None
+                    if file_chunks is None:
                         success = False
+                        continue
+                    chunks.extend(file_chunks)
+                    file_count += 1
+            
+            if not chunks:
+                self.vector_store = FAISS.from_texts([""], self.embedding_model)
+            else:
+                self._build_index(chunks)
+            
+            with open(VECTOR_STORE_PATH, 'wb') as f:
+                pickle.dump(self.vector_store, f)
             
             logger.info(f"Rebuilt vector store with {file_count} files")
             return success
@@ -134,6 +228,41 @@ class RAGService:
             logger.error(f"Error rebuilding vector store: {str(e)}")
             return False
     
+    def _build_index(self, chunks: List[Document]):
+        """
+        Embed all chunks in one pass and build the FAISS store around them.
+        
+        Corpora of IVF_MIN_VECTORS or more use an inner-product IndexIVFFlat with
+        sqrt(N) cells (at most N / IVF_MIN_POINTS_PER_CELL, so every cell has enough
+        training points), so queries only scan IVF_NPROBE cells instead of the whole corpus.
+        
+        Args:
+            chunks: Documents to index
+        """
+        texts = [chunk.page_content for chunk in chunks]
+        xb = np.ascontiguousarray(self.embedding_model.embed_documents(texts), dtype=np.float32)
+        dim = xb.shape[1]
+        
+        if len(xb) >= IVF_MIN_VECTORS:
+            quantizer = faiss.IndexFlatIP(dim)
+            nlist = min(int(math.sqrt(len(xb))), len(xb) // IVF_MIN_POINTS_PER_CELL)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(xb)
+            _configure_index(index)
+            logger.info(f"Built IVF index with {index.nlist} cells for {len(xb)} vectors")
+        else:
+            index = faiss.IndexFlatIP(dim)
+        index.add(xb)
+        
+        ids = [str(uuid.uuid4()) for _ in chunks]
+        self.vector_store = FAISS(
+            embedding_function=self.embedding_model,
+            index=index,
+            docstore=InMemoryDocstore(dict(zip(ids, chunks))),
+            index_to_docstore_id=dict(enumerate(ids)),
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+    
     def query_product_data(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
         """
         Query the vector store for relevant product data.
@@ -175,4 +304,15 @@ def get_rag_service() -> RAGService:
     global _rag_service
     if _rag_service is None:
         _rag_service = RAGService()
-    return _rag_service 
\ No newline at end of file
+    return _rag_service 
+
+# When the app is served with `gunicorn --preload -w 4 app:app` and RAG_EAGER_INIT=1,
+# build the singleton in the master process so workers share the model weights and
+# index pages copy-on-write instead of each loading their own copy after fork.
+# CUDA cannot be re-initialized in a forked worker, so GPU hosts always load lazily.
+if os.getenv("RAG_EAGER_INIT") == "1":
+    if EMBEDDING_DEVICE == "cuda":
+        logger.warning("RAG_EAGER_INIT ignored: CUDA embeddings cannot be shared across fork; "
+                       "each worker will load the RAG service on first use")
+    else:
+        get_rag_service()
@@ -1,10 +1,14 @@
 import os
+import hmac
+import hashlib
 from functools import wraps
 from flask import request, jsonify, current_app
 import time
 from datetime import datetime, timedelta
 from flask_cors import CORS
 from dotenv import load_dotenv
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 import logging
 
 # Configure logging
@@ -15,6 +19,12 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Environment settings read once at startup rather than on every request
+_FLASK_ENV = os.getenv('FLASK_ENV')
+_DEBUG = os.getenv('DEBUG') == 'True'
+_ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD')
+_DEV_BYPASS = _FLASK_ENV == 'development' and _DEBUG
+
 # Rate limiting configuration
 RATE_LIMIT = {
     'default': {'requests': 100, 'window': 60},  # 100 requests per 60 seconds by default
@@ -25,6 +35,33 @@ RATE_LIMIT = {
 # Dictionary to store request records for rate limiting
 request_records = {}
 
+# Argon2id password hasher (C backend); parameters sized for interactive logins
+_ph = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+
+def hash_password(password):
+    """Hash a password for storage in the users database"""
+    return _ph.hash(password)
+
+def verify_password(user_record, password):
+    """
+    Check a password against a user record from the users database.
+    
+    Records created before Argon2 hashing carry a 'salt' and a salted SHA-256
+    'hashed_password'; those are still accepted so existing users can log in.
+    """
+    stored = user_record.get('hashed_password')
+    if not stored:
+        return False
+    
+    if user_record.get('salt'):
+        legacy = hashlib.sha256((password + user_record['salt']).encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored)
+    
+    try:
+        return _ph.verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
 def setup_security(app):
     """Configure all security settings for the application"""
     # Setup CORS
@@ -46,7 +83,7 @@ def setup_security(app):
         return response
     
     # Log all requests in development mode
-    if os.getenv('FLASK_ENV') == 'development':
+    if _FLASK_ENV == 'development':
         @app.before_request
         def log_request_info():
             logger.debug(f"Request: {request.method} {request.path}")
@@ -107,12 +144,12 @@ def require_api_key(func):
         api_key = request.headers.get('X-API-Key')
         
         # Skip API key check in development for real application routes, but not for test routes
-        if (os.getenv('FLASK_ENV') == 'development' and os.getenv('DEBUG') == 'True' 
-            and not request.path.startswith('/test-')):
+        if _DEV_BYPASS and not request.path.startswith('/test-'):
             return func(*args, **kwargs)
         
-        # Check if API key is valid
-        if not api_key or api_key != os.getenv('ADMIN_PASSWORD'):
+        # Check if API key is valid (constant-time comparison)
+        if (not api_key or not _ADMIN_PASSWORD
+                or not hmac.compare_digest(api_key.encode('utf-8'), _ADMIN_PASSWORD.encode('utf-8'))):
             logger.warning(f"Invalid API key attempt from {request.remote_addr}")
             response = jsonify({'error': 'Invalid or missing API key'})
             response.status_code = 401
@@ -126,6 +163,15 @@ def sanitize_input(func):
     """Decorator to sanitize user input"""
     @wraps(func)
     def wrapper(*args, **kwargs):
+        # Fast path: a JSON body without angle brackets has nothing to sanitize.
+        # Bodies with \u escapes are excluded, since "\u003c" decodes to '<'.
+        # Form and multipart bodies are left to the form parser below, since
+        # reading them raw here would consume the stream.
+        if request.is_json:
+            raw = request.get_data(cache=True)
+            if b'<' not in raw and b'>' not in raw and b'\\u' not in raw:
+                return func(*args, **kwargs)
+
         # For form data
         sanitized_form = {}
         if request.form:
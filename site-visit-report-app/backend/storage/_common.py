@@ -0,0 +1,58 @@
+import re
+import time
+from datetime import datetime, timedelta
+
+# pybase64 uses a SIMD codec; fall back to the byte-identical stdlib decoder
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
+# Characters b64decode skips when not validating (line breaks, other whitespace, ...)
+_B64_IGNORED = re.compile(r'[^A-Za-z0-9+/=]')
+
+def _iter_b64_chunks(base64_data, chunk_chars=65536):
+    """
+    Decode base64 data in bounded chunks
+    
+    Characters outside the base64 alphabet are skipped, as b64decode does for the
+    whole string, and any characters past a multiple of 4 carry into the next chunk.
+    
+    Args:
+        base64_data: Base64 encoded string, optionally with a 'data:...,' prefix
+        chunk_chars: Number of input characters per chunk
+        
+    Yields:
+        Decoded bytes for each chunk
+    """
+    start = base64_data.index(',') + 1 if base64_data.startswith('data:') else 0
+    pending = ''
+    for offset in range(start, len(base64_data), chunk_chars):
+        piece = pending + _B64_IGNORED.sub('', base64_data[offset:offset + chunk_chars])
+        usable = len(piece) - len(piece) % 4
+        if usable:
+            yield b64decode(piece[:usable], validate=False)
+        pending = piece[usable:]
+    if pending:
+        # Truncated input; raises the same error as decoding the whole string
+        yield b64decode(pending, validate=False)
+
+# Cached upload date prefix as (valid_until_timestamp, 'YYYY/MM/DD')
+_date_cache = (0.0, '')
+
+def _today_prefix():
+    """
+    Get the date prefix used to organize uploads, formatting it only once per day
+    
+    Returns:
+        Today's date as 'YYYY/MM/DD'
+    """
+    global _date_cache
+    valid_until, prefix = _date_cache
+    if time.time() >= valid_until:
+        now = datetime.now()
+        next_midnight = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        prefix = now.strftime('%Y/%m/%d')
+        # Replace the whole tuple so concurrent readers never see a mixed state
+        _date_cache = (next_midnight.timestamp(), prefix)
+    return prefix
@@ -1,13 +1,12 @@
 import os
-import uuid
-import base64
+from secrets import token_hex
+import shutil
 import logging
+import threading
 from datetime import datetime
-from io import BytesIO
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from ._common import _iter_b64_chunks, _today_prefix
+
 logger = logging.getLogger(__name__)
 
 # Base directory for local storage
@@ -32,6 +31,17 @@ class LocalStorage:
         os.makedirs(self.product_data_dir, exist_ok=True)
         os.makedirs(self.reports_dir, exist_ok=True)
         
+        # Known upload directories, resolved once instead of per upload
+        self._dir_map = {
+            'photos': self.photos_dir,
+            'product-data': self.product_data_dir,
+            'reports': self.reports_dir
+        }
+        
+        # Directories already known to exist, so uploads skip repeated makedirs calls
+        self._ensured_dirs = {STORAGE_BASE_DIR, self.photos_dir, self.product_data_dir, self.reports_dir}
+        self._ensured_dirs_lock = threading.Lock()
+        
         logger.info(f"Local storage initialized at {STORAGE_BASE_DIR}")
     
     def upload_file(self, file_data, file_name, directory='general'):
@@ -47,52 +57,74 @@ class LocalStorage:
             Path of the stored file or None if upload fails
         """
         try:
-            # Determine the target directory
-            if directory == 'photos':
-                target_dir = self.photos_dir
-            elif directory == 'product-data':
-                target_dir = self.product_data_dir
-            else:
-                target_dir = os.path.join(STORAGE_BASE_DIR, directory)
-                os.makedirs(target_dir, exist_ok=True)
-            
-            # Generate a unique file name to avoid overwrites
-            file_extension = file_name.split('.')[-1] if '.' in file_name else ''
-            unique_file_name = f"{uuid.uuid4().hex}"
-            if file_extension:
-                unique_file_name = f"{unique_file_name}.{file_extension}"
-                
-            # Generate a path with date organization
-            date_prefix = datetime.now().strftime('%Y/%m/%d')
-            date_dir = os.path.join(target_dir, *date_prefix.split('/'))
-            os.makedirs(date_dir, exist_ok=True)
-            
-            file_path = os.path.join(date_dir, unique_file_name)
+            file_path = self._new_file_path(file_name, directory)
             
             # Write the file data to disk
             if hasattr(file_data, 'read'):
-                # If it's a file-like object
+                # If it's a file-like object, copy it through a fixed 1 MiB buffer
                 with open(file_path, 'wb') as f:
-                    f.write(file_data.read())
+                    shutil.copyfileobj(file_data, f, length=1024 * 1024)
             else:
                 # If it's bytes
                 with open(file_path, 'wb') as f:
-                    f.write(file_data)
+                    f.write(memoryview(file_data))
                     
-            logger.info(f"Successfully saved file to {file_path}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Successfully saved file to {file_path}")
             
-            # Return file details
-            relative_path = os.path.relpath(file_path, STORAGE_BASE_DIR)
-            return {
-                'path': file_path,
-                'relative_path': relative_path,
-                'original_filename': file_name
-            }
+            return self._file_details(file_path, file_name)
         
         except Exception as e:
             logger.error(f"Error saving file locally: {e}")
             return None
     
+    def _new_file_path(self, file_name, directory):
+        """
+        Build a unique, date-organized path for a new file, creating its directory
+        
+        Args:
+            file_name: Original name of the file
+            directory: Subdirectory in the storage
+            
+        Returns:
+            Absolute path for the new file
+        """
+        # Determine the target directory
+        target_dir = self._dir_map.get(directory)
+        if target_dir is None:
+            target_dir = os.path.join(STORAGE_BASE_DIR, directory)
+            self._ensure_dir(target_dir)
+        
+        # Generate a unique file name to avoid overwrites
+        file_extension = file_name.split('.')[-1] if '.' in file_name else ''
+        unique_file_name = token_hex(16)
+        if file_extension:
+            unique_file_name = f"{unique_file_name}.{file_extension}"
+            
+        # Generate a path with date organization
+        date_prefix = _today_prefix()
+        date_dir = os.path.join(target_dir, *date_prefix.split('/'))
+        self._ensure_dir(date_dir)
+        
+        return os.path.join(date_dir, unique_file_name)
+    
+    def _ensure_dir(self, directory):
+        """Create a directory unless this instance has already ensured it exists"""
+        if directory in self._ensured_dirs:
+            return
+        with self._ensured_dirs_lock:
+            os.makedirs(directory, exist_ok=True)
+            self._ensured_dirs.add(directory)
+    
+    def _file_details(self, file_path, file_name):
+        """Build the details returned for a stored file"""
+        relative_path = os.path.relpath(file_path, STORAGE_BASE_DIR)
+        return {
+            'path': file_path,
+            'relative_path': relative_path,
+            'original_filename': file_name
+        }
+    
     def upload_base64_image(self, base64_data, original_filename=None, directory='photos'):
         """
         Upload a base64 encoded image to local storage
@@ -106,19 +138,27 @@ class LocalStorage:
             Path of the stored file or None if upload fails
         """
         try:
-            # Convert base64 to binary
-            # If the data includes the prefix (data:image/...), remove it
-            if base64_data.startswith('data:'):
-                base64_data = base64_data.split(',')[1]
-            
-            file_data = BytesIO(base64.b64decode(base64_data))
-            
             # Default filename if none provided
             if not original_filename:
                 original_filename = f"image_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
             
-            # Upload using the standard method
-            return self.upload_file(file_data, original_filename, directory)
+            file_path = self._new_file_path(original_filename, directory)
+            
+            # Decode in bounded chunks straight to disk instead of materializing the image
+            try:
+                with open(file_path, 'wb', buffering=1 << 20) as f:
+                    for chunk in _iter_b64_chunks(base64_data):
+                        f.write(chunk)
+            except Exception:
+                # Don't leave a partially written file behind
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                raise
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Successfully saved file to {file_path}")
+            
+            return self._file_details(file_path, original_filename)
             
         except Exception as e:
             logger.error(f"Error saving base64 image locally: {e}")
@@ -139,15 +179,14 @@ class LocalStorage:
             if not os.path.isabs(path):
                 path = os.path.join(STORAGE_BASE_DIR, path)
                 
-            # Check if file exists
-            if not os.path.exists(path):
-                logger.error(f"File not found: {path}")
-                return None
-                
-            # Read and return the file data
-            with open(path, 'rb') as f:
-                return f.read()
+            # Read and return the file data; unbuffered, so readall() sizes the
+            # result from fstat and reads straight into the returned bytes
+            with open(path, 'rb', buffering=0) as f:
+                return f.readall()
                 
+        except FileNotFoundError:
+            logger.error(f"File not found: {path}")
+            return None
         except Exception as e:
             logger.error(f"Error retrieving file: {e}")
             return None
@@ -167,17 +206,15 @@ class LocalStorage:
             if not os.path.isabs(path):
                 path = os.path.join(STORAGE_BASE_DIR, path)
                 
-            # Check if file exists
-            if not os.path.exists(path):
-                logger.error(f"File not found: {path}")
-                return False
-                
             # Delete the file
             os.remove(path)
             logger.info(f"Successfully deleted file {path}")
             
             return True
                 
+        except FileNotFoundError:
+            logger.error(f"File not found: {path}")
+            return False
         except Exception as e:
             logger.error(f"Error deleting file: {e}")
             return False
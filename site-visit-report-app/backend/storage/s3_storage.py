@@ -1,19 +1,22 @@
 import os
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-from dotenv import load_dotenv
 from botocore.exceptions import ClientError
-from io import BytesIO
-import uuid
+from secrets import token_hex
+
+from ._common import _iter_b64_chunks, _today_prefix
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# S3 requires every multipart part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# Maximum number of keys S3 accepts in a single DeleteObjects request
+DELETE_BATCH_SIZE = 1000
 
 class S3Storage:
     """
@@ -27,16 +30,33 @@ class S3Storage:
         self.region_name = os.getenv('AWS_REGION', 'us-east-1')
         self.bucket_name = os.getenv('S3_BUCKET')
         
+        # Upload large files as concurrent 8 MiB multipart chunks
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=10,
+            use_threads=True
+        )
+        
         if not self.aws_access_key or not self.aws_secret_key or not self.bucket_name:
             logger.warning("AWS credentials or bucket name not provided. S3 storage will not work.")
             self.is_configured = False
         else:
             self.is_configured = True
+            # Size the connection pool above the transfer concurrency so parallel
+            # uploads reuse connections instead of queueing for a free one
+            client_config = Config(
+                max_pool_connections=32,
+                retries={'max_attempts': 5, 'mode': 'adaptive'},
+                tcp_keepalive=True,
+                s3={'use_accelerate_endpoint': False, 'addressing_style': 'virtual'}
+            )
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=self.aws_access_key,
                 aws_secret_access_key=self.aws_secret_key,
-                region_name=self.region_name
+                region_name=self.region_name,
+                config=client_config
             )
     
     def upload_file(self, file_data, file_name, directory='general'):
@@ -55,36 +75,154 @@ class S3Storage:
             logger.error("S3 storage not configured. Cannot upload file.")
             return None
         
+        key = self._new_key(file_name, directory)
+        
+        try:
+            # Upload the file
+            if hasattr(file_data, 'read'):
+                self.s3_client.upload_fileobj(
+                    file_data,
+                    self.bucket_name,
+                    key,
+                    Config=self.transfer_config
+                )
+            else:
+                # Bytes can be sent as the request body without a BytesIO wrapper
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=file_data
+                )
+            
+            return self._file_details(key, file_name)
+        except ClientError as e:
+            logger.error(f"Error uploading file to S3: {e}")
+            return None
+    
+    def upload_files(self, files, directory='general', max_workers=16):
+        """
+        Upload several files to S3 concurrently
+        
+        Args:
+            files: List of (file_data, file_name) pairs
+            directory: Subdirectory in the bucket (e.g., 'photos', 'product-data')
+            max_workers: Maximum number of uploads in flight
+            
+        Returns:
+            List of upload results in the same order as files (None for failed uploads)
+        """
+        if not files:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+            return list(executor.map(
+                lambda pair: self.upload_file(pair[0], pair[1], directory),
+                files
+            ))
+    
+    def _new_key(self, file_name, directory):
+        """
+        Build a unique, date-organized S3 key for a new file
+        
+        Args:
+            file_name: Original name of the file
+            directory: Subdirectory in the bucket
+            
+        Returns:
+            S3 key for the new file
+        """
         # Generate a unique file name to avoid overwrites
         file_extension = file_name.split('.')[-1] if '.' in file_name else ''
-        unique_file_name = f"{uuid.uuid4().hex}"
+        unique_file_name = token_hex(16)
         if file_extension:
             unique_file_name = f"{unique_file_name}.{file_extension}"
             
         # Generate a path with date organization
-        date_prefix = datetime.now().strftime('%Y/%m/%d')
-        key = f"{directory}/{date_prefix}/{unique_file_name}"
+        date_prefix = _today_prefix()
+        return f"{directory}/{date_prefix}/{unique_file_name}"
+    
+    def _file_details(self, key, file_name):
+        """Build the details returned for an uploaded file"""
+        # Generate the URL for the file
+        url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{key}"
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Successfully uploaded file to {url}")
+        return {
+            'url': url,
+            'key': key,
+            'bucket': self.bucket_name,
+            'original_filename': file_name
+        }
+    
+    def _upload_chunks(self, chunks, key):
+        """
+        Upload an iterable of byte chunks to S3 without holding the whole object in memory
+        
+        Chunks are coalesced into parts of at least MIN_PART_SIZE. Objects that fit in
+        a single part are sent with one PutObject instead of a multipart upload.
+        
+        Args:
+            chunks: Iterable of bytes
+            key: S3 key for the object
+        """
+        buffer = bytearray()
+        upload_id = None
+        parts = []
         
         try:
-            # Upload the file
-            self.s3_client.upload_fileobj(
-                file_data,
-                self.bucket_name,
-                key
-            )
+            for chunk in chunks:
+                buffer += chunk
+                if len(buffer) >= MIN_PART_SIZE:
+                    if upload_id is None:
+                        upload_id = self.s3_client.create_multipart_upload(
+                            Bucket=self.bucket_name,
+                            Key=key
+                        )['UploadId']
+                    part_number = len(parts) + 1
+                    response = self.s3_client.upload_part(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=bytes(buffer)
+                    )
+                    parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+                    buffer.clear()
             
-            # Generate the URL for the file
-            url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{key}"
-            logger.info(f"Successfully uploaded file to {url}")
-            return {
-                'url': url,
-                'key': key,
-                'bucket': self.bucket_name,
-                'original_filename': file_name
-            }
-        except ClientError as e:
-            logger.error(f"Error uploading file to S3: {e}")
-            return None
+            if upload_id is None:
+                # Small object: a single request is cheaper than a multipart upload
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=bytes(buffer)
+                )
+                return
+            
+            if buffer:
+                part_number = len(parts) + 1
+                response = self.s3_client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=bytes(buffer)
+                )
+                parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+            
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            if upload_id is not None:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id
+                )
+            raise
     
     def upload_base64_image(self, base64_data, original_filename=None, directory='photos'):
         """
@@ -103,21 +241,16 @@ class S3Storage:
             return None
         
         try:
-            # Convert base64 to binary
-            import base64
-            
-            # If the data includes the prefix (data:image/...), remove it
-            if base64_data.startswith('data:'):
-                base64_data = base64_data.split(',')[1]
-            
-            file_data = BytesIO(base64.b64decode(base64_data))
-            
             # Default filename if none provided
             if not original_filename:
                 original_filename = f"image_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
             
-            # Upload using the standard method
-            return self.upload_file(file_data, original_filename, directory)
+            key = self._new_key(original_filename, directory)
+            
+            # Decode in bounded chunks and stream them to S3
+            self._upload_chunks(_iter_b64_chunks(base64_data), key)
+            
+            return self._file_details(key, original_filename)
             
         except Exception as e:
             logger.error(f"Error uploading base64 image: {e}")
@@ -164,18 +297,45 @@ class S3Storage:
             logger.error("S3 storage not configured. Cannot delete file.")
             return False
         
-        try:
-            # Delete the file from S3
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=key
-            )
-            
+        if self.delete_files([key]):
             logger.info(f"Successfully deleted file {key}")
             return True
+        return False
+    
+    def delete_files(self, keys):
+        """
+        Delete several files from S3, up to DELETE_BATCH_SIZE keys per request
+        
+        Args:
+            keys: S3 keys for the files
+            
+        Returns:
+            True if every deletion succeeds, False otherwise
+        """
+        if not self.is_configured:
+            logger.error("S3 storage not configured. Cannot delete files.")
+            return False
+        
+        keys = list(keys)
+        success = True
+        
+        try:
+            for start in range(0, len(keys), DELETE_BATCH_SIZE):
+                batch = keys[start:start + DELETE_BATCH_SIZE]
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': k} for k in batch], 'Quiet': True}
+                )
+                
+                # In quiet mode only failed keys are reported
+                for error in response.get('Errors', []):
+                    logger.error(f"Error deleting file {error.get('Key')} from S3: {error.get('Message')}")
+                    success = False
         except ClientError as e:
-            logger.error(f"Error deleting file from S3: {e}")
+            logger.error(f"Error deleting files from S3: {e}")
             return False
+        
+        return success
 
 # Singleton instance
 _s3_storage = None
@@ -1,30 +1,28 @@
 import os
 import logging
-from dotenv import load_dotenv
+import functools
 
 # Import local storage (always available)
 from .local_storage import get_local_storage
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-# Get storage type from environment variable
-STORAGE_TYPE = os.getenv("STORAGE_TYPE", "local").lower()
-
+@functools.lru_cache(maxsize=1)
 def get_storage():
     """
     Factory function to get the appropriate storage implementation
     based on the STORAGE_TYPE environment variable.
     
+    The result is cached after the first call; call get_storage.cache_clear()
+    to pick up a changed STORAGE_TYPE.
+    
     Returns:
         Storage implementation instance
     """
-    if STORAGE_TYPE == "s3":
+    # Get storage type from environment variable
+    storage_type = os.getenv("STORAGE_TYPE", "local").lower()
+    
+    if storage_type == "s3":
         try:
             # Import S3 storage only when needed
             from .s3_storage import get_s3_storage
@@ -1,24 +1,37 @@
 import os
+import math
+import atexit
 import logging
 import pickle
 from typing import List, Dict, Any, Optional
 import uuid
-from dotenv import load_dotenv
 from langchain_huggingface import HuggingFaceEmbeddings
 import pinecone
 from langchain.vectorstores import Pinecone
 from langchain.docstore.document import Document
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 # Constants
 LOCAL_VECTOR_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vector_store.pkl")
+# The local store is persisted as a native FAISS index plus a pickle of its docstore;
+# LOCAL_VECTOR_STORE_PATH is only read to migrate stores saved as a single pickle
+LOCAL_VECTOR_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vector_store.faiss")
+LOCAL_VECTOR_DOCSTORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vector_store_docstore.pkl")
+
+# Local stores with at least this many vectors are converted from a flat index to IVF
+IVF_MIN_VECTORS = 1000
+# Upper bound on IVF cells; smaller stores use sqrt(N) cells
+IVF_NLIST = 256
+# FAISS wants at least this many training vectors per IVF cell
+IVF_MIN_POINTS_PER_CELL = 39
+# Retrain an existing IVF index once the target cell count reaches this multiple of its current one
+IVF_RETRAIN_GROWTH = 2
+# Number of IVF cells probed per query
+IVF_NPROBE = 8
+# Per-vector encoding inside IVF cells: 8-bit scalar quantization is 4x smaller
+# than float32 with near-lossless recall at MiniLM's 384 dimensions
+IVF_ENCODING = "SQ8"
 
 class VectorStorage:
     """
@@ -35,8 +48,10 @@ class VectorStorage:
         # Initialize embeddings model
         self.embeddings = HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'}
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'batch_size': 64}
         )
+        self._dim = None
         
         # Read configuration
         self.pinecone_api_key = os.getenv('PINECONE_API_KEY')
@@ -54,12 +69,22 @@ class VectorStorage:
         else:
             self.storage_type = storage_type
             
+        # Unsaved changes to the local store; written by flush() or at exit
+        self._dirty = False
+        atexit.register(self.flush)
+        
         # Initialize storage based on type
         if self.storage_type == "pinecone":
             self._init_pinecone()
         else:
             self._init_local()
     
+    def _embedding_dimension(self):
+        """Get the embedding dimension from the model config instead of embedding a probe text"""
+        if self._dim is None:
+            self._dim = self.embeddings.client.get_sentence_embedding_dimension()
+        return self._dim
+    
     def _init_pinecone(self):
         """Initialize Pinecone vector store"""
         try:
@@ -73,7 +98,7 @@ class VectorStorage:
             existing_indexes = pinecone.list_indexes()
             if self.pinecone_index_name not in existing_indexes:
                 # Get embedding dimension
-                dimension = len(self.embeddings.embed_query("test"))
+                dimension = self._embedding_dimension()
                 
                 # Create the index
                 pinecone.create_index(
@@ -103,10 +128,33 @@ class VectorStorage:
         """Initialize local FAISS vector store"""
         try:
             # First try to load existing vector store
-            if os.path.exists(LOCAL_VECTOR_STORE_PATH):
+            if os.path.exists(LOCAL_VECTOR_INDEX_PATH) and os.path.exists(LOCAL_VECTOR_DOCSTORE_PATH):
+                import faiss
+                from langchain_community.vectorstores import FAISS
+                
+                # Read the native index directly instead of unpickling it. IO_FLAG_MMAP is
+                # not used: it backs IVF lists with read-only OnDiskInvertedLists, which
+                # reject later adds and cannot be written back out
+                index = faiss.read_index(LOCAL_VECTOR_INDEX_PATH)
+                with open(LOCAL_VECTOR_DOCSTORE_PATH, "rb") as f:
+                    docstore, index_to_docstore_id = pickle.load(f)
+                self.vector_store = FAISS(
+                    embedding_function=self.embeddings,
+                    index=index,
+                    docstore=docstore,
+                    index_to_docstore_id=index_to_docstore_id
+                )
+                logger.info(f"Loaded local vector store from {LOCAL_VECTOR_INDEX_PATH}")
+                if self._upgrade_index():
+                    self._save_local_vector_store()
+            elif os.path.exists(LOCAL_VECTOR_STORE_PATH):
+                # Store saved by an older version as a single pickle; migrate it to the
+                # native format so later loads read the index instead of unpickling it
                 with open(LOCAL_VECTOR_STORE_PATH, "rb") as f:
                     self.vector_store = pickle.load(f)
                 logger.info(f"Loaded local vector store from {LOCAL_VECTOR_STORE_PATH}")
+                self._upgrade_index()
+                self._save_local_vector_store()
             else:
                 # If it doesn't exist, import FAISS and create a new one
                 from langchain_community.vectorstores import FAISS
@@ -114,7 +162,7 @@ class VectorStorage:
                 # Create an empty vector store with a dummy document
                 self.vector_store = FAISS.from_texts(["Empty vector store initialization. Delete me."], self.embeddings)
                 self._save_local_vector_store()
-                logger.info(f"Created new local vector store at {LOCAL_VECTOR_STORE_PATH}")
+                logger.info(f"Created new local vector store at {LOCAL_VECTOR_INDEX_PATH}")
         except Exception as e:
             logger.error(f"Error initializing local vector store: {e}")
             # Create an empty store if loading fails
@@ -123,16 +171,78 @@ class VectorStorage:
             self._save_local_vector_store()
             logger.warning(f"Created new local vector store due to error: {e}")
     
+    def _upgrade_index(self):
+        """
+        Replace a flat local FAISS index with a quantized IVF index once the store is large
+        enough, and retrain that IVF index as the store grows
+        
+        A flat index compares the query against every float32 vector; IVF only scans
+        the IVF_NPROBE closest cells and stores vectors as IVF_ENCODING codes. The cell
+        count is fixed at training time, so an index trained on a small store is rebuilt
+        once the target count reaches IVF_RETRAIN_GROWTH times its current cells. Vectors
+        keep their positions, so the docstore mapping is unchanged.
+        
+        Returns:
+            True if the index was replaced, False otherwise
+        """
+        import faiss
+        
+        index = self.vector_store.index
+        nlist = min(IVF_NLIST, int(math.sqrt(index.ntotal)), index.ntotal // IVF_MIN_POINTS_PER_CELL)
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            ivf = None  # Not an IVF index yet
+        
+        if ivf is not None:
+            ivf.nprobe = IVF_NPROBE
+            if nlist < ivf.nlist * IVF_RETRAIN_GROWTH:
+                return False
+            # IVF indexes need a direct map to reconstruct vectors by position; vectors
+            # come back decoded from IVF_ENCODING, which is close enough to retrain on
+            ivf.make_direct_map()
+        elif index.ntotal < IVF_MIN_VECTORS:
+            return False
+        
+        vectors = index.reconstruct_n(0, index.ntotal)
+        ivf_index = faiss.index_factory(index.d, f"IVF{nlist},{IVF_ENCODING}", index.metric_type)
+        ivf_index.train(vectors)
+        ivf_index.add(vectors)
+        faiss.extract_index_ivf(ivf_index).nprobe = IVF_NPROBE
+        
+        self.vector_store.index = ivf_index
+        logger.info(f"Rebuilt local vector store as IVF{nlist},{IVF_ENCODING} index for {index.ntotal} vectors")
+        return True
+    
     def _save_local_vector_store(self):
         """Save local vector store to disk"""
         if self.storage_type == "local":
             try:
-                with open(LOCAL_VECTOR_STORE_PATH, "wb") as f:
-                    pickle.dump(self.vector_store, f)
-                logger.info(f"Saved local vector store to {LOCAL_VECTOR_STORE_PATH}")
+                import faiss
+                
+                # Write to temporary files and rename them into place, so an
+                # interrupted save never leaves a truncated index on disk
+                index_tmp = f"{LOCAL_VECTOR_INDEX_PATH}.tmp"
+                docstore_tmp = f"{LOCAL_VECTOR_DOCSTORE_PATH}.tmp"
+                faiss.write_index(self.vector_store.index, index_tmp)
+                with open(docstore_tmp, "wb") as f:
+                    pickle.dump(
+                        (self.vector_store.docstore, self.vector_store.index_to_docstore_id),
+                        f,
+                        protocol=5
+                    )
+                os.replace(index_tmp, LOCAL_VECTOR_INDEX_PATH)
+                os.replace(docstore_tmp, LOCAL_VECTOR_DOCSTORE_PATH)
+                logger.info(f"Saved local vector store to {LOCAL_VECTOR_INDEX_PATH}")
             except Exception as e:
                 logger.error(f"Error saving local vector store: {e}")
     
+    def flush(self):
+        """Save the local vector store to disk if it has unsaved changes"""
+        if self._dirty:
+            self._save_local_vector_store()
+            self._dirty = False
+    
     def add_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
         """
         Add texts to the vector store
@@ -164,20 +274,26 @@ class VectorStorage:
                 # Using local FAISS
                 import numpy as np
                 
-                # Get text embeddings
-                embeddings = [self.embeddings.embed_query(text) for text in texts]
+                # Embed all texts in one batched forward pass into one contiguous float32 matrix
+                emb_matrix = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
                 
-                # Add to FAISS index
-                for i, (text, metadata) in enumerate(zip(texts, metadatas)):
-                    doc_id = metadata.get("id", str(uuid.uuid4()))
-                    self.vector_store.add_embeddings(
-                        text_embeddings=[(text, np.array(embeddings[i]))],
-                        metadatas=[metadata]
-                    )
-                    ids.append(doc_id)
+                # Add the matrix to the FAISS index directly and record the documents
+                start = self.vector_store.index.ntotal
+                self.vector_store.index.add(emb_matrix)
+                docstore_ids = [str(uuid.uuid4()) for _ in texts]
+                self.vector_store.docstore.add({
+                    docstore_id: Document(page_content=text, metadata=metadata)
+                    for docstore_id, text, metadata in zip(docstore_ids, texts, metadatas)
+                })
+                self.vector_store.index_to_docstore_id.update(
+                    {start + i: docstore_id for i, docstore_id in enumerate(docstore_ids)}
+                )
+                ids = [metadata["id"] for metadata in metadatas]
                 
-                # Save the updated vector store
-                self._save_local_vector_store()
+                self._upgrade_index()
+                
+                # Defer saving; callers ingesting in bulk call flush() once at the end
+                self._dirty = True
             
             return ids
         except Exception as e:
@@ -245,7 +361,7 @@ class VectorStorage:
                 pinecone.delete_index(self.pinecone_index_name)
                 
                 # Get embedding dimension
-                dimension = len(self.embeddings.embed_query("test"))
+                dimension = self._embedding_dimension()
                 
                 # Recreate the index
                 pinecone.create_index(
@@ -1,40 +1,25 @@
-import io
-import os
-import base64
+import sys
+from functools import lru_cache
 from pathlib import Path
-import requests
+from typing import Final
 from generate_pdf import generate_pdf_report
 
-# Function to get an image from URL and convert to base64
-def get_image_base64(image_url):
-    response = requests.get(image_url, stream=True)
-    response.raise_for_status()
-    img_buffer = io.BytesIO(response.content)
-    return f"data:image/jpeg;base64,{base64.b64encode(img_buffer.getvalue()).decode('utf-8')}"
-
-# Sample test images with building envelope features
-image_urls = [
-    "https://images.pexels.com/photos/2219024/pexels-photo-2219024.jpeg",  # Construction site
-    "https://images.pexels.com/photos/1838640/pexels-photo-1838640.jpeg",  # Building exterior
+# Committed JPEG fixtures, downscaled from the repo's site photos; download_fixtures.py
+# can optionally replace them with the Pexels originals
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURE_IMAGES = [
+    FIXTURES_DIR / "building_1.jpg",  # Fastener.png: membrane fastener and stress plate
+    FIXTURES_DIR / "building_2.jpg",  # Seam not adhered.jpg: weather barrier tape at a seam
 ]
 
-# Download images and convert to base64
-print("Downloading test images...")
-images_with_data = []
-for i, url in enumerate(image_urls):
-    try:
-        base64_data = get_image_base64(url)
-        caption = "Close-up view of a single-ply membrane roofing system showing a mechanical fastener with a stress plate/washer centered in a cut-out access panel or repair patch, with visible seam lines and minor surface soiling around the perimeter." if i == 0 else "Exterior view of building envelope showing Tyvek weather barrier tape installation with visible wrinkled application at seam connections."
-        images_with_data.append({
-            "dataUrl": base64_data,
-            "caption": caption
-        })
-        print(f"Downloaded image {i+1}")
-    except Exception as e:
-        print(f"Error downloading image {i+1}: {str(e)}")
+# Caption for each fixture image, in the same order
+CAPTIONS = [
+    "Close-up view of a single-ply membrane roofing system showing a mechanical fastener with a stress plate/washer centered in a cut-out access panel or repair patch, with visible seam lines and minor surface soiling around the perimeter.",
+    "Exterior view of building envelope showing Tyvek weather barrier tape installation with visible wrinkled application at seam connections.",
+]
 
-# Create a long description text to test footer overflow
-long_observation = """# Observations
+# Long description text to test footer overflow
+LONG_OBSERVATION: Final[str] = """# Observations
 
 Building Envelope Related:
 
@@ -62,13 +47,8 @@ The minor surface soiling around the perimeter could indicate early stages of po
 
 More concerning is the Tyvek weather barrier tape installation. The wrinkled application and compromised adhesion represent significant quality control failures during installation. Weather barriers serve as critical components in the building envelope system, providing the primary defense against water intrusion while allowing vapor transmission. Properly sealed seams are essential to this performance. The compromised adhesion highlighted in the red box presents an immediate vulnerability in the building envelope."""
 
-# Sample report data with formats that showcase all the formatting enhancements
-sample_report_data = {
-    "projectName": "Building Envelope Assessment - Layout Test",
-    "reportNumber": "TEST-LAYOUT-001",
-    "subject": "Testing Page Layout Fixes",
-    "description": long_observation,
-    "action": """## Recommended Action Items
+# Action items text for the report
+ACTION_ITEMS: Final[str] = """## Recommended Action Items
 
 **Immediate Actions Required**:
 
@@ -90,7 +70,37 @@ sample_report_data = {
 
 4. Document all corrections for project records.
 
-5. Conduct regular inspections of the building envelope to identify any additional issues.""",
+5. Conduct regular inspections of the building envelope to identify any additional issues."""
+
+# Function to read a fixture image, memoized so repeated fixtures are read once
+@lru_cache(maxsize=64)
+def load_fixture(path):
+    return path.read_bytes()
+
+# Load the fixture images; the PDF generator embeds the JPEG bytes directly
+print("Loading test images...")
+images_with_data = []
+for i, (path, caption) in enumerate(zip(FIXTURE_IMAGES, CAPTIONS), start=1):
+    try:
+        images_with_data.append({
+            "jpegBytes": load_fixture(path),
+            "caption": caption
+        })
+        print(f"Loaded image {i}")
+    except FileNotFoundError:
+        print(f"Missing fixture {path.name}; run download_fixtures.py to fetch it")
+
+# Without every fixture the PDF has no image pages to lay out, so fail the run
+if len(images_with_data) != len(FIXTURE_IMAGES):
+    sys.exit(1)
+
+# Sample report data with formats that showcase all the formatting enhancements
+sample_report_data = {
+    "projectName": "Building Envelope Assessment - Layout Test",
+    "reportNumber": "TEST-LAYOUT-001",
+    "subject": "Testing Page Layout Fixes",
+    "description": LONG_OBSERVATION,
+    "action": ACTION_ITEMS,
     "images": images_with_data
 }
 
@@ -101,16 +111,17 @@ output_dir.mkdir(exist_ok=True)
 # Generate the PDF using our enhanced generator
 try:
     print("Generating PDF with improved page layout...")
-    pdf_buffer = generate_pdf_report(sample_report_data)
-    
-    # Save the PDF to a file
+    # Write the PDF straight into the output file
     output_file = output_dir / "page_layout_test.pdf"
     with open(output_file, "wb") as f:
-        f.write(pdf_buffer.getbuffer())
+        generate_pdf_report(sample_report_data, out=f)
+        # The file position after writing is the PDF size, so no stat is needed
+        size_bytes = f.tell()
     
     print(f"PDF generated successfully and saved to {output_file}")
-    print(f"PDF size: {os.path.getsize(output_file) / 1024:.2f} KB")
+    print(f"PDF size: {size_bytes / 1024:.2f} KB")
 except Exception as e:
     print(f"Error generating PDF: {str(e)}")
     import traceback
-    traceback.print_exc() 
\ No newline at end of file
+    traceback.print_exc()
+    sys.exit(1)
@@ -1,14 +1,28 @@
+import os
 import requests
 
+# MultipartEncoder builds the body lazily as it is sent; fall back to plain files= without it
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+
 # Set the Flask API URL and the image path
 url = "http://localhost:5001/analyze-image"
 image_path = "C:/Larry/apple.jpg"  # Update with your image path
 
 # Open the image file in binary mode
 with open(image_path, "rb") as image_file:
+    image_name = os.path.basename(image_path)
+    
     # Send a POST request to the Flask API with the image file
-    files = {"image": image_file}
-    response = requests.post(url, files=files)
+    if MultipartEncoder is not None:
+        # Stream the file into the request instead of reading it all into memory first
+        encoder = MultipartEncoder(fields={"image": (image_name, image_file, "image/jpeg")})
+        response = requests.post(url, data=encoder, headers={"Content-Type": encoder.content_type})
+    else:
+        files = {"image": (image_name, image_file, "image/jpeg")}
+        response = requests.post(url, files=files)
 
     # Print the JSON response from the Flask API
     print(response.json())